@@ -123,7 +123,7 @@ df['k'] = pow( df['WindStd100']/df['WindMean100'], -1.086 )
 df['c'] = df['WindMean100'] / (1+1/df['k']).apply(lambda x: gamma(x))
 # P = 1atm * (1 - 0.0065 z / T)^5.255
 # with z = elev + wind_onshore turbine height
-df['z'] = df['Elev']*(df['Elev']>0) + 100
+df['z'] = np.maximum(df['Elev'].to_numpy(), 0.0) + 100
 df['P'] = 101325 * pow(1-0.0065*df['z']/288.15, 5.255) # [Pa]
 # rho := air density = P/RT
 df['rho'] = df['P'] / (287.05 * 288.15) # [kg/m³]
@@ -26,10 +26,12 @@ def area(latitude):
 
 # Wind power calculations
 # Capacity factor calculation depending on wind_onshore speed distribution and wind_onshore turbine specification
+# The shape 3/k of the incomplete gamma functions is computed once and shared by the three gamma evaluations
 def capacity_factor(v_r, c, k):
-    return -np.exp(-pow(model_params.v_f / c, k)) + 3 * pow(c, 3) * gamma(3 / k) / (
-                k * (pow(v_r, 3) - pow(model_params.v_c, 3))) * (
-                       gammainc(3 / k, pow(v_r / c, k)) - gammainc(3 / k, pow(model_params.v_c / c, k)))
+    a = 3 / k
+    return -np.exp(-np.power(model_params.v_f / c, k)) + 3 * np.power(c, 3) * gamma(a) / (
+                k * (np.power(v_r, 3) - model_params.v_c ** 3)) * (
+                       gammainc(a, np.power(v_r / c, k)) - gammainc(a, np.power(model_params.v_c / c, k)))
 
 
 # Wind farm array effect = -a exp(-b * lambda) avec lambda = pi / 4*n^2
@@ -52,7 +54,7 @@ def array_efficiency(n):
 # n = turbine spacing in # rotor diameter
 # Capacity density [W/m2] = Pr / (nD)^2 =  1/2 * Cp_max * rho(elevation) * PI / (4 * n^2) * v_rated^3
 def rated_power(v_r, n, rho, area):
-    return 1 / 2 * model_params.C_pmax * rho * pi / (4 * n * n) * pow(v_r, 3) * area
+    return 1 / 2 * model_params.C_pmax * rho * pi / (4 * n * n) * np.power(v_r, 3) * area
 
 
 # Energy produced on a given area over wind_onshore turbine life time [J/year]
@@ -92,25 +94,32 @@ def life_time_efficiency(eta, pr, degradation_rate, life_time):
 # And the name of the corresponding eout et eroi column in the world grid df
 def df_cum_eout_eroi(df, eout, eroi):
     df_cum = DataFrame(index=df.index)
-    df_cum[['e', 'eroi']] = df.loc[:, [eout, eroi]]
+    df_cum[['e', 'eroi']] = df.loc[:, [eout, eroi]].astype('float64')  # Cumulated sums need double precision
     df_cum = df_cum.sort_values(by=['eroi'], ascending=False)
     df_cum['e_cum'] = df_cum['e'].cumsum()
     return df_cum
 
 
 # Data processing
-# From a table of (land cover name, suitability factor), build a corresponding suitability factor per cell
-# Inputs:   sf_table = file location of the table
-#           name = of the new column created in the dataframe
+# From tables of (land cover name, suitability factor), build the corresponding suitability factors per cell
+# Tables sharing the same classes (land cover, slope) are combined in a single (class x table) matrix so that their
+# factors are computed in one pass, each factor only reads the classes of its own table
+# Inputs:   sf_tables = file locations of the tables
+#           names = of the new columns created in the dataframe (one per table)
 #
-def compute_sf(df, sf_table, name):
-    sf = read_csv(sf_table, sep=',', header=None).transpose()
-    df[name] = 0
-    total = 0
-    for i in range(len(sf.iloc[0, :])):
-        df[name] += df[sf.iloc[0, i]] * sf.iloc[1, i]
-        total += df[sf.iloc[0, i]]
-    df[name] = df[name]/total
+def compute_sf(df, sf_tables, names):
+    tables = [read_csv(sf_table, sep=',', header=None, index_col=0).iloc[:, 0] for sf_table in sf_tables]
+    groups = {}
+    for j, table in enumerate(tables):
+        groups.setdefault(tuple(table.index), []).append(j)
+    sf = np.empty((len(df), len(tables)))
+    for classes, js in groups.items():
+        weights = np.column_stack([tables[j].to_numpy() for j in js])
+        cover = df[list(classes)].to_numpy(dtype='float64')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sf[:, js] = (cover @ weights) / cover.sum(axis=1)[:, None]
     # Correct the suitability factor to account for the proportion of protected areas in each cell
-    df[name] *= (100 - df['protected']) / 100
+    sf *= ((100 - df['protected'].to_numpy(dtype='float64')) / 100)[:, None]
+    for j, name in enumerate(names):
+        df[name] = sf[:, j]
     return df
@@ -1,6 +1,12 @@
+import hashlib
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
 from pandas import read_csv
-from math import gamma
+from scipy.special import gamma
 
 import model_params
 import model_methods
@@ -21,23 +27,93 @@ import model_methods
 # Configuration -> location of the folder with the input files
 data_files = "data/"
 sf_files = "data/suitability_factors/"
+# Configuration -> location of the folder where the built grids are stored between sessions (None to disable)
+cache_files = "data/cache/"
+# Configuration -> compute the energy outputs, inputs and EROI of the grid cells in parallel with dask
+parallel = False
+
+
+# Column names of an input file, read once per session
+@lru_cache(maxsize=None)
+def col_names(file, sep):
+    return tuple(read_csv(data_files+file, sep=sep, header=None, engine='python').iloc[0])
+
+
+# Scalar module-level values of a module, i.e. its tunable parameters
+def module_params(module):
+    return {name: value for name, value in vars(module).items()
+            if not name.startswith('_') and isinstance(value, (int, float, bool, str))}
+
+
+# Modification times of the input files and of the model sources, along with the parameters of model_params and
+# model_methods in effect and the pandas / numpy versions, a stored grid is only reused if none of them changed
+# Parameters modified at runtime are taken into account, as long as they are module-level values of these two modules
+def cache_key():
+    sources = [data_files + file for file in ['Col_names', 'Col_names_solarRooftop', 'wind_solar_0_75', 'rooftop_area']]
+    sources += [sf_files + file for file in sorted(os.listdir(sf_files))]
+    sources += [model_params.__file__, model_methods.__file__, __file__]
+    return {'mtimes': {source: os.path.getmtime(source) for source in sources},
+            'model_params': module_params(model_params), 'model_methods': module_params(model_methods),
+            'data_files': data_files, 'sf_files': sf_files, 'versions': [pd.__version__, np.__version__]}
+
+
+# Load the grid stored for the current key if there is one, otherwise build it and store it for the next sessions
+# Each key gets its own file, named after a hash of the key, so sessions with different parameters never share a file
+# The file is written to a temporary name and moved into place so that it is never read half-written
+def load_or_build(name, build):
+    if cache_files is None:
+        return build()
+    key_hash = hashlib.sha1(json.dumps(cache_key(), sort_keys=True).encode()).hexdigest()[:16]
+    path = cache_files + name + '_' + key_hash + '.pkl'
+    if os.path.exists(path):
+        try:
+            return pd.read_pickle(path)
+        except Exception:  # e.g. stored by another pandas version, the grid is built again
+            pass
+    df = build()
+    os.makedirs(cache_files, exist_ok=True)
+    tmp_path = path + '.tmp' + str(os.getpid())
+    df.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+    return df
 
 
 # Build the world grid based on input files
+# The grid is only built once per session (and rebuilt if an input or a model parameter changes), callers get their own
+# copy so they can add or modify columns
 def world_grid():
-    col_names = read_csv(data_files+'Col_names', sep='; ', header=None)
-    df = pd.read_table(data_files+'wind_solar_0_75', header=None)
-    df = df.iloc[:, 0:46]
-    df = df.rename(columns=col_names.iloc[0])
+    return _world_grid().copy()
+
+
+def _world_grid():
+    return _cached_world_grid(json.dumps(cache_key(), sort_keys=True))
+
+
+@lru_cache(maxsize=1)
+def _cached_world_grid(key):
+    return load_or_build('world_grid', build_world_grid)
+
+
+def build_world_grid():
+    # Only the first 46 columns of the input file are used, the others are skipped at parsing time
+    # Geographical and meteorological inputs do not need double precision, they are stored as float32
+    # All the quantities derived from them (areas, wind parameters, energy inputs / outputs, EROI) are computed in
+    # float64
+    names = list(col_names('Col_names', '; '))
+    df = read_csv(data_files+'wind_solar_0_75', sep='\t', header=None, names=names, usecols=range(len(names)),
+                  dtype={name: ('category' if name == 'Country' else 'float32') for name in names}, engine='c')
 
     # -------- Discard cells where no RES can presumably be installed --------#
-    df = df.loc[(df['Country'].isnull() == False) & (df['Country'] != 'Antarctica') & (df['Country'] != 'Greenland') & (
-            df['Country'] != 'French Southern & Antarctic Lands')]
-    df = df.loc[~df['Country'].apply(lambda x: 'Island' in str(x))]
-    df = df.loc[~df['Country'].apply(lambda x: 'Is.' in str(x))]
-    df = df.loc[df['Elev'] >= model_params.maxWaterDepth_wind]
-    df = df.loc[df['v_r_opti'].isnull() == False]  # For some of these cells, the suppression is very debatable
+    # Country is categorical, so the names are only tested once per country and cells are filtered on their codes
+    countries = df['Country'].cat.categories
+    excluded = countries.isin({'Antarctica', 'Greenland', 'French Southern & Antarctic Lands'}) | countries.str.contains(
+        r'Island|Is\.', regex=True)
+    country_ok = df['Country'].notna() & ~df['Country'].cat.codes.isin(np.flatnonzero(excluded))
+    elev_ok = df['Elev'] >= model_params.maxWaterDepth_wind
+    vr_notna = df['v_r_opti'].notna()  # For some of these cells, the suppression is very debatable
     # (e.g. in the Caspian Sea)
+    # The conditions are combined before slicing so the frame is only copied once, with a fresh contiguous index
+    df = df.loc[country_ok & elev_ok & vr_notna].reset_index(drop=True)
 
     # -------- Compute the total area of each cell [m²] --------#
     df['Area'] = model_methods.area(df['Lat'])
@@ -45,54 +121,88 @@ def world_grid():
     # -------- Compute the suitable area in each cell for RES installation --------#
     # Inputs files contain, for each land cover class, the corresponding % of area considered as suitable for each type
     # of RES (wind, solar pv and solar csp)
-    df = model_methods.compute_sf(df, sf_files+'wind_onshore', 'wind_sf_onshore')
-    df = model_methods.compute_sf(df, sf_files + 'wind_offshore', 'wind_sf_offshore')
-    df = model_methods.compute_sf(df, sf_files + 'pv', 'pv_sf')
-    df = model_methods.compute_sf(df, sf_files + 'csp', 'csp_sf')
-
-    df.loc[df['Elev'] < model_params.maxWaterDepth_wind, 'wind_sf_offshore'] = 0  # Should already have been removed
-    # For wind offshore, and additional constraints is based on the distance to the coast
-    # EU Report 4 % of 0 - 10 km, 10 % of 10 - 50 km, 25 % of > 50 km
-    # NREL Report 10 % of 0 - 5 Nm, 33 % of 5 - 20 Nm, 67 % of > 20 Nm
-    df.loc[df['DistCoast'] >= 37.04, 'wind_sf_offshore'] *= 0.67
-    df.loc[(df['DistCoast'] < 37.04) & (df['DistCoast'] >= 9.26), 'wind_sf_offshore'] *= 0.33
-    df.loc[df['DistCoast'] < 9.26, 'wind_sf_offshore'] *= 0.1
-
     # For solar power plants, geographical constraints also include the mean slope
     # PV requires slope <= 30%, CSP requires slope <= 2%
-    df = model_methods.compute_sf(df, sf_files+'slope_pv', 'slope_pv_sf')
+    sf_columns = {'wind_onshore': 'wind_sf_onshore', 'wind_offshore': 'wind_sf_offshore', 'pv': 'pv_sf',
+                  'csp': 'csp_sf', 'slope_pv': 'slope_pv_sf', 'slope_csp': 'slope_csp_sf'}
+    df = model_methods.compute_sf(df, [sf_files + table for table in sf_columns], list(sf_columns.values()))
     df['pv_sf'] *= df['slope_pv_sf']
-    df = model_methods.compute_sf(df, sf_files + 'slope_csp', 'slope_csp_sf')
     df['csp_sf'] *= df['slope_csp_sf']
 
+    # For wind offshore, and additional constraints is based on the distance to the coast
+    # EU Report 4 % of 0 - 10 km, 10 % of 10 - 50 km, 25 % of > 50 km
+    # NREL Report 10 % of 0 - 5 Nm, 33 % of 5 - 20 Nm, 67 % of > 20 Nm
+    # Cells deeper than the max water depth should already have been removed, they are set to 0 in the same pass
+    dist = df['DistCoast'].to_numpy(dtype='float64')
+    offshore_mult = np.select([df['Elev'].to_numpy() < model_params.maxWaterDepth_wind, dist < 9.26, dist < 37.04,
+                               dist >= 37.04], [0, 0.1, 0.33, 0.67], default=1)
+    df['wind_sf_offshore'] = df['wind_sf_offshore'].to_numpy() * offshore_mult
+
     # Compute suitable area for each RES based on the total area [m²] and on the suitability factor [%]
-    df['wind_area_onshore'] = df['Area'] * df['wind_sf_onshore']  # [m²]
-    df['wind_area_offshore'] = df['Area'] * df['wind_sf_offshore']  # [m²]
-    df['pv_area'] = df['Area'] * df['pv_sf']  # [m²]
-    df['csp_area'] = df['Area'] * df['csp_sf']  # [m²]
+    sf = df[['wind_sf_onshore', 'wind_sf_offshore', 'pv_sf', 'csp_sf']].to_numpy()
+    areas = df['Area'].to_numpy()[:, None] * sf  # [m²]
+    df['wind_area_onshore'] = areas[:, 0]
+    df['wind_area_offshore'] = areas[:, 1]
+    df['pv_area'] = areas[:, 2]
+    df['csp_area'] = areas[:, 3]
 
     # -------- Build parameters for wind energy in each cell --------#
     # Database only contains wind at 71 and 125 m height, we take the arithmetic mean of mean and std to approximate
     # wind speed at 100 m height
-    df['WindMean100'] = (df['WindMean71'] + df['WindMean125']) / 2
-    df['WindStd100'] = (df['WindStd71'] + df['WindStd125']) / 2
+    df['WindMean100'] = (df['WindMean71'].to_numpy(dtype='float64') + df['WindMean125'].to_numpy(dtype='float64')) / 2
+    df['WindStd100'] = (df['WindStd71'].to_numpy(dtype='float64') + df['WindStd125'].to_numpy(dtype='float64')) / 2
     # Weibull parameters (k and c) of the wind speed distribution are approximated based on mean and std of wind speed
     # at 100m height
-    df['k'] = pow(df['WindStd100'] / df['WindMean100'], -1.086)
-    df['c'] = df['WindMean100'] / (1 + 1 / df['k']).apply(lambda x: gamma(x))
+    wind_mean = df['WindMean100'].to_numpy()
+    k = np.power(df['WindStd100'].to_numpy() / wind_mean, -1.086)
+    df['k'] = k
+    df['c'] = wind_mean / gamma(1.0 + 1.0 / k)
     # P = 1atm * (1 - 0.0065 z / T)^5.255
     # with z = elev + hub height (100 m)
-    df['z'] = df['Elev'] * (df['Elev'] > 0) + 100
+    elev = df['Elev'].to_numpy(dtype='float64')
+    z = np.maximum(elev, 0.0) + 100.0
     # Pressure at hub height (100 m)
-    df['P'] = 101325 * pow(1 - 0.0065 * df['z'] / 288.15, 5.255)  # [Pa]
+    P = 101325.0 * np.power(1.0 - 0.0065 * z / 288.15, 5.255)  # [Pa]
+    df['z'] = z
+    df['P'] = P
     # Air density = P/RT at hub height (100 m)
-    df['air_density'] = df['P'] / (287.05 * 288.15)  # [kg/m³]
+    df['air_density'] = P * (1.0 / (287.05 * 288.15))  # [kg/m³]
 
     return df
 
 
 def world_grid_eroi():
+    return load_or_build('world_grid_eroi', build_world_grid_eroi)
+
+
+def build_world_grid_eroi():
     df = world_grid()
+    if not parallel:
+        return compute_eroi(df)
+    # Every output only depends on its own cell, the grid is split in one partition per core
+    import dask.dataframe as dd
+    # The output schema is given explicitly, from the computation on an empty grid
+    meta = compute_eroi(df.iloc[:0].copy())
+    return dd.from_pandas(df, npartitions=os.cpu_count() or 1).map_partitions(compute_eroi, meta=meta).compute()
+
+
+# Compute the energy outputs, energy inputs and EROI of each cell of the world grid df
+def compute_eroi(df):
+    # Model parameters are bound once as local names before the array expressions
+    fixedOnshore, fixedOffshoreFixed, fixedOffshoreFloating = (model_params.fixedOnshore,
+                                                               model_params.fixedOffshoreFixed,
+                                                               model_params.fixedOffshoreFloating)
+    offshoreFixedFoundations = model_params.offshoreFixedFoundations
+    onshoreKm = model_params.onshoreOMKm + model_params.onshoreInstallationKm
+    offshoreKm = model_params.offshoreOMKm + model_params.offshoreInstallationKm + model_params.offshoreCableKm
+    availFactor_onshore, availFactor_offshore = model_params.availFactor_onshore, model_params.availFactor_offshore
+    remove_operational_e = model_params.remove_operational_e
+    oe_wind_onshore, oe_wind_offshore, oe_pv = (model_params.oe_wind_onshore, model_params.oe_wind_offshore,
+                                                model_params.oe_pv)
+    wind_life_time, pv_life_time, pv_life_time_inputs = (model_params.wind_life_time, model_params.pv_life_time,
+                                                         model_params.pv_life_time_inputs)
+    pv_gcr, wc_pv_panel = model_params.pv_gcr, model_params.wc_pv_panel
+
     # -------- Compute the wind energy outputs, energy inputs and EROI --------#
 
     # 1. Energy inputs [J / GW installed]
@@ -107,83 +217,89 @@ def world_grid_eroi():
     # offshoreFixedFoundations(depth: Length) = scaling factor fixed * (Gigajoules(16173 + 361962 + 10326 + 3477293))
 
     # For onshore wind, a fixed value per GW + a value depending on the distance to coast
-    df['inputs_gw_onshore'] = model_params.fixedOnshore + abs(df['DistCoast']) * (model_params.onshoreOMKm +
-                                                                                  model_params.onshoreInstallationKm)
+    elev = df['Elev'].to_numpy(dtype='float64')
+    dist = np.abs(df['DistCoast'].to_numpy(dtype='float64'))
+    df['inputs_gw_onshore'] = fixedOnshore + dist * onshoreKm
 
     # For offshore wind, the model distinguishes between fixed foundation (water depth < 40m) and floating foundations
     # for water depth between 40 and 1000 m (the max water depth allowed can be adapted in model_params).
     # For fixed foundations a scaling factor is applied based on the depth
-    scaling_factor_fixed_foundations = 2.19 * ((df['Elev'] > -40) & (df['Elev'] <= -35)) + 1.95 * (
-                (df['Elev'] > -35) & (df['Elev'] <= -30)) + 1.57 * ((df['Elev'] > -30) & (df['Elev'] <= -25)) + 1.34 * (
-                                                       (df['Elev'] > -25) & (df['Elev'] <= -20)) + 1.08 * (
-                                                       (df['Elev'] > -20) & (df['Elev'] <= -15)) + 1 * (
-                                                       df['Elev'] > -15)
-
-    df['inputs_gw_offshore'] = (df['Elev'] <= -40) * model_params.fixedOffshoreFixed + (df['Elev'] > -40) * model_params.fixedOffshoreFloating
-    df['inputs_gw_offshore'] += scaling_factor_fixed_foundations * model_params.offshoreFixedFoundations
+    # Depth bins are right-closed, e.g. -40 < elev <= -35 -> 2.19; elev <= -40 (floating) -> 0
+    depth_bins = np.array([-40, -35, -30, -25, -20, -15])
+    depth_factors = np.array([0., 2.19, 1.95, 1.57, 1.34, 1.08, 1.])
+    scaling_factor_fixed_foundations = depth_factors[np.searchsorted(depth_bins, elev, side='left')]
+
     # Finally, inputs that depend on the distance to the coast are added
-    df['inputs_gw_offshore'] += abs(df['DistCoast']) * (model_params.offshoreOMKm + model_params.offshoreInstallationKm + model_params.offshoreCableKm)
+    df['inputs_gw_offshore'] = (np.where(elev <= -40, fixedOffshoreFixed, fixedOffshoreFloating)
+                                + scaling_factor_fixed_foundations * offshoreFixedFoundations + dist * offshoreKm)
 
     # 2. Energy outputs [EJ / year]
-    df['wind_onshore_e'] = model_methods.E_out_wind(df.v_r_opti, df.n_opti, df.c, df.k, df.air_density, df.wind_area_onshore, model_params.availFactor_onshore) * 1e-18
-    df['wind_offshore_e'] = model_methods.E_out_wind(df.v_r_opti, df.n_opti, df.c, df.k, df.air_density, df.wind_area_offshore, model_params.availFactor_offshore) * 1e-18
-    if model_params.remove_operational_e :
-        df['wind_onshore_e'] *= (1 - model_params.oe_wind_onshore)
-        df['wind_offshore_e'] *= (1 - model_params.oe_wind_offshore)
-    df['wind_e'] = df['wind_onshore_e'] + df['wind_offshore_e']
+    # The wind model is evaluated on the underlying numpy arrays, without any pandas alignment
+    v_r, n, c, k, rho = (df[col].to_numpy(dtype='float64') for col in ['v_r_opti', 'n_opti', 'c', 'k', 'air_density'])
+    area_onshore, area_offshore = df['wind_area_onshore'].to_numpy(), df['wind_area_offshore'].to_numpy()
+    # Outputs are linear in the area, the Weibull integration is done once per m² and shared by onshore and offshore
+    e_per_m2 = model_methods.E_out_wind(v_r, n, c, k, rho, 1.0, 1.0) * 1e-18
+    df['wind_onshore_e'] = e_per_m2 * area_onshore * availFactor_onshore
+    df['wind_offshore_e'] = e_per_m2 * area_offshore * availFactor_offshore
+    if remove_operational_e:
+        df['wind_onshore_e'] *= (1 - oe_wind_onshore)
+        df['wind_offshore_e'] *= (1 - oe_wind_offshore)
+    df['wind_e'] = df['wind_onshore_e'].to_numpy() + df['wind_offshore_e'].to_numpy()
 
     # 3. Energy inputs in [EJ/year]
     # Compute the installed capacity based on the optimal rated wind speed and turbine spacing in each cell
     # Then the energy invested "per year" is the installed capacity [GW] * energy inputs [J/GW] / life time
-    df['wind_onshore_e_in'] = model_methods.E_in_wind(df.v_r_opti, df.n_opti, df.air_density, df['wind_area_onshore'],
-                                                      df['inputs_gw_onshore']) * 1e-18 / model_params.wind_life_time
-    df['wind_offshore_e_in'] = model_methods.E_in_wind(df.v_r_opti, df.n_opti, df.air_density, df['wind_area_offshore'],
-                                                       df['inputs_gw_offshore']) * 1e-18 / model_params.wind_life_time
-    df['wind_e_in'] = df['wind_onshore_e_in'] + df['wind_offshore_e_in']
+    inputs_gw_onshore, inputs_gw_offshore = df['inputs_gw_onshore'].to_numpy(), df['inputs_gw_offshore'].to_numpy()
+    # Inputs are linear in the area and in the inputs per GW, the installed capacity per m² is shared as well
+    e_in_per_m2 = model_methods.E_in_wind(v_r, n, rho, 1.0, 1.0) * 1e-18 / wind_life_time
+    df['wind_onshore_e_in'] = e_in_per_m2 * area_onshore * inputs_gw_onshore
+    df['wind_offshore_e_in'] = e_in_per_m2 * area_offshore * inputs_gw_offshore
+    df['wind_e_in'] = df['wind_onshore_e_in'].to_numpy() + df['wind_offshore_e_in'].to_numpy()
 
     # 4. EROI = Energy outputs [EJ/year] / Energy inputs [EJ/year]
-    df['wind_onshore_eroi'] = df['wind_onshore_e'] / df['wind_onshore_e_in']
-    df['wind_offshore_eroi'] = df['wind_offshore_e'] / df['wind_offshore_e_in']
-    df['wind_eroi'] = df['wind_e'] / df['wind_e_in']
+    # Cells without suitable area have no inputs, their EROI is left as nan / inf
+    e = df[['wind_onshore_e', 'wind_offshore_e', 'wind_e']].to_numpy()
+    e_in = df[['wind_onshore_e_in', 'wind_offshore_e_in', 'wind_e_in']].to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df['wind_onshore_eroi'], df['wind_offshore_eroi'], df['wind_eroi'] = (e / e_in).T
 
     # -------- Compute the solar pv energy outputs, energy inputs and EROI --------#
-    df['pv_e'] = model_methods.E_out_solar(df['GHI'], df['pv_area']* model_params.pv_gcr) * 1e-18
-    if model_params.remove_operational_e:
-        df['pv_e'] *= (1 - model_params.oe_pv)
-    gw_installed = model_params.wc_pv_panel * df['pv_area'] * model_params.pv_gcr / 1E9
-    df['pv_e_in'] = (model_params.pv_life_time_inputs / model_params.pv_life_time) * gw_installed * 1e-18
+    df['pv_e'] = model_methods.E_out_solar(df['GHI'], df['pv_area'] * pv_gcr) * 1e-18
+    if remove_operational_e:
+        df['pv_e'] *= (1 - oe_pv)
+    gw_installed = wc_pv_panel * df['pv_area'] * pv_gcr / 1E9
+    df['pv_e_in'] = (pv_life_time_inputs / pv_life_time) * gw_installed * 1e-18
     df['pv_eroi'] = df['pv_e'] / df['pv_e_in']
 
     # -------- Compute the solar csp energy outputs, energy inputs and EROI --------#
     return df
 
 def world_rooftop_pv():
-    col_names = read_csv(data_files+'Col_names_solarRooftop', sep=', ', header=None)
     df = pd.read_table(data_files+'rooftop_area', header=None)
-    df = df.rename(columns=col_names.iloc[0])
+    df = df.rename(columns=dict(enumerate(col_names('Col_names_solarRooftop', ', '))))
     df.set_index('Country', inplace=True)
-    mean_ghi = (world_grid().groupby(['Country']).mean())['GHI']
+    mean_ghi = _world_grid()[['Country', 'GHI']].groupby('Country', sort=False, observed=True)['GHI'].mean()
+    mean_ghi = mean_ghi.astype('float64')
     df = pd.concat([df, mean_ghi.reindex(df.index)], axis=1)
-    df.loc['Singapore', 'GHI'] = df.loc['Malaysia', 'GHI']
-    df.loc['Bahrain', 'GHI'] = df.loc['Qatar', 'GHI']
-    df.loc['Chinese Taipei', 'GHI'] = df.loc['China', 'GHI']
-    df.loc['Hong Kong, China', 'GHI'] = df.loc['China', 'GHI']
-    df.loc['Kosovo', 'GHI'] = df.loc['Montenegro', 'GHI']
+    # Countries missing from the world grid take the GHI of a neighbouring country, in a single gather / scatter
+    ghi_from = {'Singapore': 'Malaysia', 'Bahrain': 'Qatar', 'Chinese Taipei': 'China', 'Hong Kong, China': 'China',
+                'Kosovo': 'Montenegro'}
+    df.loc[list(ghi_from), 'GHI'] = df.loc[list(ghi_from.values()), 'GHI'].to_numpy()
     df.loc[['Netherlands Antilles', 'Gibraltar'], 'GHI'] = 0
 
-    df['residential_e'] = model_methods.E_out_solar(df['GHI'], df['Area PV Residential'] * 1E6 * model_params.sf_residential) * 1e-18
-    df['commercial_e'] = model_methods.E_out_solar(df['GHI'], df['Area PV Commercial'] * 1E6 * model_params.sf_commercial) * 1e-18
+    # Residential and commercial rooftops are computed together, as the two columns of the same arrays
+    area = df[['Area PV Residential', 'Area PV Commercial']].to_numpy() * 1E6 * np.array(
+        [model_params.sf_residential, model_params.sf_commercial])  # [m²]
+    e = model_methods.E_out_solar(df['GHI'].to_numpy()[:, None], area) * 1e-18
     if model_params.remove_operational_e:
-        df['residential_e'] *= (1 - model_params.oe_pv)
-        df['commercial_e'] *= (1 - model_params.oe_pv)
-
-    gw_installed_res = model_params.wc_pv_panel * df['Area PV Residential'] * 1E6 * model_params.sf_residential / 1E9
-    df['residential_e_in'] = (model_params.pv_life_time_inputs / model_params.pv_life_time) * gw_installed_res * 1e-18
-    gw_installed_com = model_params.wc_pv_panel * df['Area PV Commercial'] * 1E6 * model_params.sf_commercial / 1E9
-    df['commercial_e_in'] = (model_params.pv_life_time_inputs / model_params.pv_life_time) * gw_installed_com * 1e-18
+        e *= (1 - model_params.oe_pv)
+    gw_installed = model_params.wc_pv_panel * area / 1E9
+    e_in = (model_params.pv_life_time_inputs / model_params.pv_life_time) * gw_installed * 1e-18
+    df['residential_e'], df['commercial_e'] = e.T
+    df['residential_e_in'], df['commercial_e_in'] = e_in.T
 
-    df['pv_e'] = df['residential_e'] + df['commercial_e']
-    df['pv_e_in'] = df['residential_e_in'] + df['commercial_e_in']
+    df['pv_e'] = e.sum(axis=1)
+    df['pv_e_in'] = e_in.sum(axis=1)
     df['pv_eroi'] = df['pv_e'] / df['pv_e_in'] #.apply(lambda x: max(x, 1))  # EROI_residential = EROI_commercial = EROI_total
 
     return df